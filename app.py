@@ -1,6 +1,21 @@
+import os
+import sqlite3
+import time
+
 import streamlit as st
 
 from data_models import DEFAULT_DATA
+from dataset_store import get_store
+from session_memory import (
+    MEMORY_REPORT_ENABLED,
+    PROCESS_CAP_BYTES,
+    SESSION_CAP_BYTES,
+    current_session_report,
+    memory_report,
+    process_totals,
+    touch_session,
+)
+from startup_snapshot import load_snapshot
 from ui_components import render_dashboard, render_editor
 
 
@@ -11,9 +26,72 @@ st.set_page_config(
 )
 
 
+PINNED_VERSION = os.environ.get("DATASET_PINNED_VERSION")
+
+
+@st.cache_resource(show_spinner=False)
+def get_startup_snapshot():
+    return load_snapshot()
+
+
 def init_state() -> None:
     if "dataset" not in st.session_state:
-        st.session_state["dataset"] = DEFAULT_DATA.copy()
+        # Novas sessoes partem do padrao (ou da versao fixada); restaurar outra versao e opcional.
+        dataset = None
+        store = get_store()
+        if PINNED_VERSION and store is not None:
+            try:
+                dataset = store.load_version(PINNED_VERSION)
+            except sqlite3.Error:
+                dataset = None
+        st.session_state["dataset"] = dataset if dataset is not None else DEFAULT_DATA.copy()
+        st.session_state["dataset_version"] = PINNED_VERSION if dataset is not None else None
+
+
+def render_version_picker() -> None:
+    store = get_store()
+    if store is None:
+        st.sidebar.caption("Historico de versoes indisponivel: os dados ficam apenas nesta sessao.")
+        return
+    try:
+        versions = store.list_versions()
+    except sqlite3.Error:
+        st.sidebar.caption("Historico de versoes indisponivel: os dados ficam apenas nesta sessao.")
+        return
+    if not versions:
+        return
+    labels = {
+        version["digest"]: (
+            f"{time.strftime('%d/%m %H:%M', time.localtime(version['last_used_at']))} "
+            f"- {version['label'] or version['digest'][:8]}"
+        )
+        for version in versions
+    }
+    current = st.session_state.get("dataset_version")
+    # Quando a versao ativa muda (edicao ou restauracao), o seletor volta para ela.
+    if st.session_state.get("version_selector_for") != current:
+        st.session_state.pop("version_selector", None)
+        st.session_state["version_selector_for"] = current
+    options = list(labels)
+    selected = st.sidebar.selectbox(
+        "Versoes salvas",
+        options,
+        index=options.index(current) if current in labels else None,
+        placeholder="Escolha uma versao",
+        format_func=labels.get,
+        key="version_selector",
+    )
+    if selected is not None and selected != current and st.sidebar.button("Carregar versao"):
+        try:
+            dataset = store.load_version(selected)
+        except sqlite3.Error:
+            dataset = None
+        if dataset is None:
+            st.sidebar.error("Nao foi possivel carregar a versao selecionada.")
+            return
+        st.session_state["dataset"] = dataset
+        st.session_state["dataset_version"] = selected
+        st.rerun()
 
 
 def inject_base_styles() -> None:
@@ -34,6 +112,52 @@ def inject_base_styles() -> None:
     )
 
 
+def _format_bytes(value: float) -> str:
+    if value < 1024:
+        return f"{int(value)} B"
+    if value < 1024 * 1024:
+        return f"{value / 1024:.1f} KB"
+    return f"{value / (1024 * 1024):.1f} MB"
+
+
+def render_memory_usage() -> None:
+    report = current_session_report()
+    if report is None:
+        return
+    expander = st.sidebar.expander("Memoria da sessao")
+    expander.markdown(
+        "\n".join(
+            [
+                f"- **Dataset:** {_format_bytes(report['dataset_bytes'])}",
+                f"- **Calculos em cache:** {_format_bytes(report['derived_bytes'])}",
+                f"- **Graficos em cache:** {_format_bytes(report['figure_bytes'])}",
+                f"- **Total:** {_format_bytes(report['total_bytes'])} de {_format_bytes(SESSION_CAP_BYTES)}",
+            ]
+        )
+    )
+    totals = process_totals()
+    expander.caption(
+        f"{totals['sessions']} sessao(oes) neste processo: "
+        f"{_format_bytes(totals['total_bytes'])} de {_format_bytes(PROCESS_CAP_BYTES)}"
+    )
+    # O relatorio de todas as sessoes percorre o registro inteiro: so para operadores.
+    if MEMORY_REPORT_ENABLED and expander.checkbox("Mostrar todas as sessoes", key="memory_report_all"):
+        expander.dataframe(
+            [
+                {
+                    "sessao": row["session_id"][:8],
+                    "ociosa (s)": round(row["idle_s"]),
+                    "dataset": _format_bytes(row["dataset_bytes"]),
+                    "calculos": _format_bytes(row["derived_bytes"]),
+                    "graficos": _format_bytes(row["figure_bytes"]),
+                    "total": _format_bytes(row["total_bytes"]),
+                }
+                for row in memory_report()
+            ],
+            hide_index=True,
+        )
+
+
 def main() -> None:
     init_state()
     inject_base_styles()
@@ -43,15 +167,29 @@ def main() -> None:
 
     if st.sidebar.button("Restaurar valores originais"):
         st.session_state["dataset"] = DEFAULT_DATA.copy()
-        st.experimental_rerun()
+        st.session_state["dataset_version"] = None
+        store = get_store()
+        if store is not None:
+            try:
+                st.session_state["dataset_version"] = store.save_version(DEFAULT_DATA, label="Valores originais")
+            except sqlite3.Error:
+                pass
+        st.rerun()
+
+    render_version_picker()
 
-    current_df = st.session_state["dataset"].copy()
+    touch_session()
+
+    # Os renderizadores nao alteram o DataFrame, entao a sessao nao precisa de uma copia por rerun.
+    current_df = st.session_state["dataset"]
 
     if view == "Dashboard":
-        render_dashboard(current_df)
+        render_dashboard(current_df, get_startup_snapshot())
     else:
         render_editor(current_df)
 
+    render_memory_usage()
+
 
 if __name__ == "__main__":
     main()
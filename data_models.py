@@ -1,5 +1,8 @@
+import hashlib
+import json
 from typing import Dict, List
 
+import numpy as np
 import pandas as pd
 
 
@@ -19,15 +22,13 @@ MODEL_TITLES: Dict[str, str] = {
     "preco_pro_max": "iPhone Pro Max",
 }
 
-DEFAULT_DATA: pd.DataFrame = pd.DataFrame(
-    {
-        "ano": ANOS_LABEL,
-        "salario_minimo": [1100.00, 1212.00, 1302.00, 1412.00, 1518.00],
-        "preco_base": [7599, 7599, 7299, 7799, 7999],
-        "preco_pro": [9499, 9499, 9299, 10499, 11499],
-        "preco_pro_max": [10499, 10499, 10099, 12499, 12499],
-    }
-)
+DEFAULT_VALUES: Dict[str, list] = {
+    "ano": ANOS_LABEL,
+    "salario_minimo": [1100.00, 1212.00, 1302.00, 1412.00, 1518.00],
+    "preco_base": [7599, 7599, 7299, 7799, 7999],
+    "preco_pro": [9499, 9499, 9299, 10499, 11499],
+    "preco_pro_max": [10499, 10499, 10099, 12499, 12499],
+}
 
 COLUMN_DISPLAY_NAMES: Dict[str, str] = {
     "ano": "Ano",
@@ -48,3 +49,54 @@ COLOR_MAP: Dict[str, str] = {
     "salario_minimo": "#a855f7",
     "projecao": "#facc15",
 }
+
+
+# Datasets com os rotulos padrao compartilham o mesmo dicionario de categorias.
+ANO_DTYPE = pd.CategoricalDtype(ANOS_LABEL)
+
+
+def label_dtype(labels: List[str]) -> pd.CategoricalDtype:
+    if set(labels).issubset(ANOS_LABEL):
+        return ANO_DTYPE
+    return pd.CategoricalDtype(list(dict.fromkeys(labels)))
+
+
+def compact_dataset(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Converte o dataset para a politica de armazenamento compacta:
+    rotulos categoricos, int32 para inteiros e float32 quando nao ha perda de precisao.
+    """
+    compact = pd.DataFrame(index=df.index)
+    labels = df["ano"].astype(str).tolist()
+    compact["ano"] = pd.Categorical(labels, dtype=label_dtype(labels))
+    for column in ["salario_minimo", *MODEL_COLUMNS]:
+        values = pd.to_numeric(df[column])
+        if pd.api.types.is_integer_dtype(values):
+            info = np.iinfo(np.int32)
+            if values.between(info.min, info.max).all():
+                values = values.astype(np.int32)
+        else:
+            as_float32 = values.astype(np.float32)
+            if (as_float32.astype(np.float64) == values.astype(np.float64)).all():
+                values = as_float32
+        compact[column] = values
+    return compact
+
+
+def build_default_data() -> pd.DataFrame:
+    return compact_dataset(pd.DataFrame(DEFAULT_VALUES))
+
+
+DEFAULT_DATA: pd.DataFrame = build_default_data()
+
+
+def dataset_fingerprint(df: pd.DataFrame) -> str:
+    """
+    Gera um hash do conteudo do dataset, independente do dtype das colunas.
+    """
+    payload = {
+        column: [value if isinstance(value, str) else float(value) for value in df[column].tolist()]
+        for column in COLUMN_DISPLAY_NAMES
+    }
+    encoded = json.dumps(payload, sort_keys=True, separators=(",", ":"))
+    return hashlib.sha256(encoded.encode("utf-8")).hexdigest()
@@ -0,0 +1,261 @@
+"""
+Persistencia de versoes do dataset em SQLite (modo WAL).
+
+As versoes sao enderecadas pelo conteudo (`dataset_fingerprint`), entao edicoes
+identicas sao gravadas uma unica vez. Cada coluna e guardada separadamente para
+que uma tela carregue apenas as colunas de que precisa. Resultados derivados
+(esforco, projecao, figuras) ficam associados a versao do dataset e a versao
+do codigo que os gerou.
+"""
+
+import json
+import os
+import pickle
+import queue
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional
+
+import pandas as pd
+
+from data_models import COLUMN_DISPLAY_NAMES, compact_dataset, dataset_fingerprint, label_dtype
+from startup_snapshot import derived_code_version
+
+DB_PATH = Path(os.environ.get("DATASET_DB", Path(__file__).with_name("datasets.sqlite3")))
+POOL_SIZE = int(os.environ.get("DATASET_DB_POOL_SIZE", "4"))
+# Versoes alem deste limite sao removidas, das usadas ha mais tempo para as mais recentes.
+MAX_VERSIONS = int(os.environ.get("DATASET_MAX_VERSIONS", "50"))
+VERSION_LIST_TTL_S = float(os.environ.get("DATASET_VERSION_LIST_TTL_S", "5"))
+# Depois de uma falha ao abrir o banco, o app segue so em memoria por este intervalo.
+STORE_RETRY_S = 60.0
+
+SCHEMA_VERSION = 1
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS versions (
+    digest TEXT PRIMARY KEY,
+    created_at REAL NOT NULL,
+    last_used_at REAL NOT NULL,
+    label TEXT
+);
+CREATE TABLE IF NOT EXISTS version_columns (
+    digest TEXT NOT NULL REFERENCES versions(digest) ON DELETE CASCADE,
+    name TEXT NOT NULL,
+    dtype TEXT NOT NULL,
+    payload TEXT NOT NULL,
+    PRIMARY KEY (digest, name)
+);
+CREATE TABLE IF NOT EXISTS derived (
+    digest TEXT NOT NULL REFERENCES versions(digest) ON DELETE CASCADE,
+    code_version TEXT NOT NULL,
+    key TEXT NOT NULL,
+    payload BLOB NOT NULL,
+    PRIMARY KEY (digest, code_version, key)
+);
+CREATE INDEX IF NOT EXISTS versions_last_used_at ON versions(last_used_at);
+"""
+
+
+class ConnectionPool:
+    """
+    Pool de conexoes SQLite compartilhado pelas sessoes do processo.
+    """
+
+    def __init__(self, path: Path, size: int = POOL_SIZE) -> None:
+        self.path = path
+        self.size = size
+        self._idle: "queue.LifoQueue[sqlite3.Connection]" = queue.LifoQueue()
+        self._created = 0
+        self._lock = threading.Lock()
+
+    def _connect(self) -> sqlite3.Connection:
+        connection = sqlite3.connect(self.path, timeout=30, check_same_thread=False)
+        connection.execute("PRAGMA journal_mode=WAL")
+        connection.execute("PRAGMA synchronous=NORMAL")
+        connection.execute("PRAGMA foreign_keys=ON")
+        return connection
+
+    @contextmanager
+    def connection(self) -> Iterator[sqlite3.Connection]:
+        try:
+            connection = self._idle.get_nowait()
+        except queue.Empty:
+            with self._lock:
+                can_create = self._created < self.size
+                if can_create:
+                    self._created += 1
+            if not can_create:
+                connection = self._idle.get()
+            else:
+                try:
+                    connection = self._connect()
+                except Exception:
+                    # Devolve a vaga: uma falha de conexao nao pode encolher o pool.
+                    with self._lock:
+                        self._created -= 1
+                    raise
+        try:
+            with connection:
+                yield connection
+        finally:
+            self._idle.put(connection)
+
+
+class DatasetStore:
+    def __init__(self, path: Path = DB_PATH, pool_size: int = POOL_SIZE) -> None:
+        self.pool = ConnectionPool(path, pool_size)
+        self.code_version = derived_code_version()
+        self._versions_cache: Optional[tuple] = None
+        self._versions_lock = threading.Lock()
+        with self.pool.connection() as connection:
+            # CREATE IF NOT EXISTS e idempotente, entao varios processos podem abrir o banco juntos.
+            connection.executescript(SCHEMA)
+            connection.execute(f"PRAGMA user_version = {SCHEMA_VERSION}")
+            # Resultados gerados por outra versao do codigo de graficos nao sao mais servidos.
+            connection.execute("DELETE FROM derived WHERE code_version != ?", (self.code_version,))
+
+    def _invalidate_versions(self) -> None:
+        with self._versions_lock:
+            self._versions_cache = None
+
+    def _prune(self, connection: sqlite3.Connection) -> None:
+        connection.execute(
+            "DELETE FROM versions WHERE digest NOT IN "
+            "(SELECT digest FROM versions ORDER BY last_used_at DESC LIMIT ?)",
+            (MAX_VERSIONS,),
+        )
+
+    def save_version(self, df: pd.DataFrame, label: Optional[str] = None) -> str:
+        """
+        Grava o dataset e retorna seu digest. Conteudo ja existente nao e duplicado,
+        mas passa a ser a versao usada mais recentemente. Versoes alem de
+        MAX_VERSIONS sao descartadas junto com seus resultados derivados.
+        """
+        digest = dataset_fingerprint(df)
+        now = time.time()
+        with self.pool.connection() as connection:
+            inserted = connection.execute(
+                "INSERT OR IGNORE INTO versions (digest, created_at, last_used_at, label) VALUES (?, ?, ?, ?)",
+                (digest, now, now, label),
+            ).rowcount
+            if not inserted:
+                connection.execute("UPDATE versions SET last_used_at = ? WHERE digest = ?", (now, digest))
+            else:
+                connection.executemany(
+                    "INSERT INTO version_columns (digest, name, dtype, payload) VALUES (?, ?, ?, ?)",
+                    [
+                        (
+                            digest,
+                            column,
+                            str(df[column].dtype),
+                            json.dumps([value if isinstance(value, str) else float(value) for value in df[column].tolist()]),
+                        )
+                        for column in COLUMN_DISPLAY_NAMES
+                    ],
+                )
+                self._prune(connection)
+        self._invalidate_versions()
+        return digest
+
+    def load_version(self, digest: str, columns: Optional[List[str]] = None) -> Optional[pd.DataFrame]:
+        """
+        Carrega uma versao. Com `columns`, busca apenas essas colunas no banco.
+        Carregar a versao inteira a marca como usada mais recentemente.
+        """
+        wanted = list(columns) if columns is not None else list(COLUMN_DISPLAY_NAMES)
+        placeholders = ", ".join("?" for _ in wanted)
+        with self.pool.connection() as connection:
+            rows = connection.execute(
+                f"SELECT name, dtype, payload FROM version_columns WHERE digest = ? AND name IN ({placeholders})",
+                (digest, *wanted),
+            ).fetchall()
+            if len(rows) == len(wanted) and columns is None:
+                connection.execute("UPDATE versions SET last_used_at = ? WHERE digest = ?", (time.time(), digest))
+        if len(rows) != len(wanted):
+            return None
+        if columns is None:
+            self._invalidate_versions()
+
+        data = {}
+        for name, dtype, payload in rows:
+            values = json.loads(payload)
+            if dtype == "category":
+                data[name] = pd.Categorical(values, dtype=label_dtype(values))
+            else:
+                data[name] = pd.Series(values).astype(dtype)
+        df = pd.DataFrame(data)[wanted]
+        return compact_dataset(df) if columns is None else df
+
+    def list_versions(self, limit: int = 20) -> List[Dict[str, object]]:
+        """
+        Versoes mais recentes primeiro. A lista fica em cache no processo por
+        VERSION_LIST_TTL_S, ou ate a proxima gravacao ou carga, ja que o seletor
+        a consulta a cada rerun de cada sessao.
+        """
+        now = time.monotonic()
+        with self._versions_lock:
+            cached = self._versions_cache
+        if cached is not None and cached[0] == limit and now - cached[1] < VERSION_LIST_TTL_S:
+            return list(cached[2])
+        with self.pool.connection() as connection:
+            rows = connection.execute(
+                "SELECT digest, created_at, last_used_at, label FROM versions ORDER BY last_used_at DESC LIMIT ?",
+                (limit,),
+            ).fetchall()
+        versions = [
+            {"digest": digest, "created_at": created_at, "last_used_at": last_used_at, "label": label}
+            for digest, created_at, last_used_at, label in rows
+        ]
+        with self._versions_lock:
+            self._versions_cache = (limit, now, versions)
+        return list(versions)
+
+    def save_derived(self, digest: str, key: tuple, value: object) -> None:
+        payload = pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL)
+        with self.pool.connection() as connection:
+            connection.execute(
+                "INSERT OR REPLACE INTO derived (digest, code_version, key, payload) "
+                "SELECT ?, ?, ?, ? WHERE EXISTS (SELECT 1 FROM versions WHERE digest = ?)",
+                (digest, self.code_version, repr(key), payload, digest),
+            )
+
+    def load_derived(self, digest: str, key: tuple) -> Optional[object]:
+        with self.pool.connection() as connection:
+            row = connection.execute(
+                "SELECT payload FROM derived WHERE digest = ? AND code_version = ? AND key = ?",
+                (digest, self.code_version, repr(key)),
+            ).fetchone()
+        if row is None:
+            return None
+        try:
+            return pickle.loads(row[0])
+        except Exception:
+            return None
+
+
+_STORE: Optional[DatasetStore] = None
+_STORE_LOCK = threading.Lock()
+_STORE_FAILED_AT = {"at": None}
+
+
+def get_store() -> Optional[DatasetStore]:
+    """
+    Retorna o store compartilhado do processo, criando-o no primeiro uso.
+    Retorna None se o banco nao puder ser aberto; nova tentativa apos STORE_RETRY_S.
+    """
+    global _STORE
+    with _STORE_LOCK:
+        if _STORE is None:
+            failed_at = _STORE_FAILED_AT["at"]
+            if failed_at is not None and time.monotonic() - failed_at < STORE_RETRY_S:
+                return None
+            try:
+                _STORE = DatasetStore()
+            except (sqlite3.Error, OSError):
+                _STORE_FAILED_AT["at"] = time.monotonic()
+                return None
+            _STORE_FAILED_AT["at"] = None
+        return _STORE
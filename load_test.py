@@ -0,0 +1,259 @@
+"""
+Teste de carga para o app.py: simula varias sessoes abertas no mesmo processo
+com o AppTest headless do Streamlit e reporta latencia de rerun, vazao e pico
+de RSS. Os reruns das sessoes sao intercalados, nao paralelos (ver _RUN_LOCK):
+a latencia inclui a espera na fila, como a de um usuario num worker ocupado,
+e o tempo de servico (so o rerun) e reportado a parte.
+
+Uso:
+    python load_test.py --sessions 1 5 10 20 --actions 30
+"""
+
+import argparse
+import json
+import multiprocessing
+import queue
+import random
+import resource
+import sys
+import threading
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+
+APP_PATH = Path(__file__).with_name("app.py")
+
+ACTION_WEIGHTS: Dict[str, int] = {
+    "switch_view": 3,
+    "change_years": 4,
+    "edit_cell": 2,
+    "reset": 1,
+}
+
+
+def _percentile(values: List[float], percent: float) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    rank = (len(ordered) - 1) * percent / 100
+    lower = int(rank)
+    upper = min(lower + 1, len(ordered) - 1)
+    return ordered[lower] + (ordered[upper] - ordered[lower]) * (rank - lower)
+
+
+def _peak_rss_bytes() -> int:
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reporta em KiB, macOS em bytes.
+    return peak if sys.platform == "darwin" else peak * 1024
+
+
+# O AppTest cria e desfaz um Runtime global a cada run, entao dois runs simultaneos
+# no mesmo processo se atrapalham. As sessoes se intercalam, mas os reruns sao serializados.
+_RUN_LOCK = threading.Lock()
+
+
+def _timed_run(at) -> Tuple[float, float]:
+    """
+    Retorna (latencia, servico): a latencia conta desde o pedido, incluindo a espera pelo lock.
+    """
+    requested = time.perf_counter()
+    with _RUN_LOCK:
+        start = time.perf_counter()
+        at.run()
+        end = time.perf_counter()
+    return end - requested, end - start
+
+
+def _run_action(at, action: str, rng: random.Random) -> List[Tuple[float, float]]:
+    """
+    Executa uma acao do roteiro e retorna (latencia, servico) de cada rerun disparado.
+    """
+    from data_models import MODEL_COLUMNS
+
+    latencies: List[Tuple[float, float]] = []
+    if action == "switch_view":
+        radio = at.radio(key="view_selector")
+        options = list(radio.options)
+        current = radio.value
+        radio.set_value(next(option for option in options if option != current))
+    elif action == "change_years":
+        if at.radio(key="view_selector").value != "Dashboard":
+            at.radio(key="view_selector").set_value("Dashboard")
+            latencies.append(_timed_run(at))
+        base = at.selectbox(key="comparison_base_year")
+        target = at.selectbox(key="comparison_target_year")
+        options = list(base.options)
+        base.set_value(rng.choice(options))
+        target.set_value(rng.choice(options))
+    elif action == "edit_cell":
+        # O AppTest nao interage com st.data_editor; a edicao e aplicada
+        # diretamente no dataset da sessao, como faz o botao do editor.
+        # A coluna vira float antes da escrita: colunas inteiras rejeitam valores fracionarios.
+        dataset = at.session_state["dataset"].copy()
+        column = rng.choice(["salario_minimo", *MODEL_COLUMNS])
+        row = rng.randrange(len(dataset))
+        dataset[column] = dataset[column].astype(float)
+        dataset.loc[dataset.index[row], column] = float(dataset[column].iloc[row]) * rng.uniform(0.9, 1.1)
+        at.session_state["dataset"] = dataset
+    elif action == "reset":
+        at.sidebar.button[0].click()
+    latencies.append(_timed_run(at))
+    return latencies
+
+
+def _first_line(text: str) -> str:
+    lines = str(text).strip().splitlines()
+    return lines[0] if lines else ""
+
+
+def _describe(exc: BaseException) -> str:
+    return f"{type(exc).__name__}: {_first_line(str(exc))}"
+
+
+def _run_session(session_index: int, actions: int, seed: int, timeout: float) -> Dict[str, object]:
+    from streamlit.testing.v1 import AppTest
+
+    rng = random.Random(seed + session_index)
+    names = list(ACTION_WEIGHTS.keys())
+    weights = list(ACTION_WEIGHTS.values())
+    latencies: List[Tuple[float, float]] = []
+    failures: List[str] = []
+
+    at = AppTest.from_file(str(APP_PATH), default_timeout=timeout)
+    latencies.append(_timed_run(at))
+    failures.extend(f"inicial: {_first_line(element.message)}" for element in at.exception)
+
+    for _ in range(actions):
+        action = rng.choices(names, weights)[0]
+        try:
+            latencies.extend(_run_action(at, action, rng))
+        except Exception as exc:
+            failures.append(f"{action}: {_describe(exc)}")
+            continue
+        # O AppTest nao propaga excecoes do script; elas aparecem como elementos.
+        failures.extend(f"{action}: {_first_line(element.message)}" for element in at.exception)
+
+    return {"latencies": latencies, "failures": failures}
+
+
+def _warm_baseline() -> int:
+    # Carrega os mesmos modulos que as sessoes usam, sem abrir nenhuma sessao.
+    import charts  # noqa: F401
+    import ui_components  # noqa: F401
+    from streamlit.testing.v1 import AppTest  # noqa: F401
+
+    return _peak_rss_bytes()
+
+
+def run_level(sessions: int, actions: int, seed: int, timeout: float) -> Dict[str, object]:
+    """
+    Executa `sessions` sessoes simultaneas (com reruns serializados) e agrega as metricas do nivel.
+    """
+    baseline_rss = _warm_baseline()
+    start = time.perf_counter()
+    results: List[Dict[str, object]] = []
+    if sessions:
+        with ThreadPoolExecutor(max_workers=sessions) as executor:
+            results = list(
+                executor.map(
+                    lambda index: _run_session(index, actions, seed, timeout),
+                    range(sessions),
+                )
+            )
+    elapsed = time.perf_counter() - start
+
+    latencies = [latency for result in results for latency, _ in result["latencies"]]
+    service = [duration for result in results for _, duration in result["latencies"]]
+    failures = Counter(failure for result in results for failure in result["failures"])
+    peak_rss = _peak_rss_bytes()
+    return {
+        "sessions": sessions,
+        "reruns": len(latencies),
+        "errors": sum(failures.values()),
+        "failures": dict(failures.most_common()),
+        "elapsed_s": elapsed,
+        "throughput_rps": len(latencies) / elapsed if elapsed else 0.0,
+        "p50_ms": _percentile(latencies, 50) * 1000,
+        "p95_ms": _percentile(latencies, 95) * 1000,
+        "p99_ms": _percentile(latencies, 99) * 1000,
+        "service_p50_ms": _percentile(service, 50) * 1000,
+        "service_p95_ms": _percentile(service, 95) * 1000,
+        "peak_rss_mb": peak_rss / (1024 * 1024),
+        "baseline_rss_mb": baseline_rss / (1024 * 1024),
+        # Acrescimo sobre o processo sem sessoes (interpretador, Streamlit e modulos do app).
+        "rss_per_session_mb": (peak_rss - baseline_rss) / (1024 * 1024) / sessions if sessions else 0.0,
+    }
+
+
+def _level_worker(result_queue, sessions: int, actions: int, seed: int, timeout: float) -> None:
+    result_queue.put(run_level(sessions, actions, seed, timeout))
+
+
+def run_isolated_level(
+    sessions: int, actions: int, seed: int, timeout: float, level_timeout: float
+) -> Dict[str, object]:
+    """
+    Roda o nivel em um processo novo para que o pico de RSS nao acumule entre niveis.
+    """
+    context = multiprocessing.get_context("spawn")
+    result_queue = context.Queue()
+    process = context.Process(target=_level_worker, args=(result_queue, sessions, actions, seed, timeout))
+    process.start()
+    try:
+        return result_queue.get(timeout=level_timeout)
+    except queue.Empty:
+        raise RuntimeError(
+            f"Nivel com {sessions} sessao(oes) nao retornou resultado "
+            f"(exitcode={process.exitcode})."
+        ) from None
+    finally:
+        if process.is_alive():
+            process.terminate()
+        process.join()
+
+
+def format_report(rows: List[Dict[str, object]]) -> str:
+    header = (
+        f"{'sessoes':>7} {'reruns':>7} {'erros':>6} {'rerun/s':>8} "
+        f"{'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'svc p50':>8} {'svc p95':>8} "
+        f"{'RSS MB':>8} {'base MB':>8} {'MB/sessao':>10}"
+    )
+    lines = [header, "-" * len(header)]
+    for row in rows:
+        lines.append(
+            f"{row['sessions']:>7} {row['reruns']:>7} {row['errors']:>6} {row['throughput_rps']:>8.1f} "
+            f"{row['p50_ms']:>8.1f} {row['p95_ms']:>8.1f} {row['p99_ms']:>8.1f} "
+            f"{row['service_p50_ms']:>8.1f} {row['service_p95_ms']:>8.1f} "
+            f"{row['peak_rss_mb']:>8.1f} {row['baseline_rss_mb']:>8.1f} {row['rss_per_session_mb']:>10.2f}"
+        )
+    for row in rows:
+        for failure, count in row["failures"].items():
+            lines.append(f"[{row['sessions']} sessoes] {count}x {failure}")
+    return "\n".join(lines)
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Teste de carga do app.py com sessoes simultaneas.")
+    parser.add_argument("--sessions", type=int, nargs="+", default=[1, 5, 10], help="Quantidades de sessoes a testar.")
+    parser.add_argument("--actions", type=int, default=20, help="Acoes por sessao.")
+    parser.add_argument("--seed", type=int, default=0, help="Semente do roteiro de acoes.")
+    parser.add_argument("--timeout", type=float, default=30.0, help="Timeout por rerun (s).")
+    parser.add_argument("--level-timeout", type=float, default=1800.0, help="Timeout por nivel (s).")
+    parser.add_argument("--json", dest="json_path", help="Grava o resultado em JSON neste caminho.")
+    args = parser.parse_args(argv)
+
+    rows = [
+        run_isolated_level(sessions, args.actions, args.seed, args.timeout, args.level_timeout)
+        for sessions in args.sessions
+    ]
+    print(format_report(rows))
+    if args.json_path:
+        Path(args.json_path).write_text(json.dumps(rows, indent=2))
+    return 1 if any(row["errors"] for row in rows) else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
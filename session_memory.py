@@ -0,0 +1,278 @@
+"""
+Contabilidade de memoria por sessao e cache de artefatos derivados.
+
+Cada sessao guarda seus resultados derivados (esforco, projecao, figuras) em
+`st.session_state["derived"]`, com o SQLite de `dataset_store` como segundo
+nivel. Um registro por processo mantem totais correntes de cada sessao; ao
+ultrapassar os limites, descarta primeiro os artefatos derivados das sessoes
+ociosas. O dataset em si nunca e descartado.
+"""
+
+import os
+import sqlite3
+import sys
+import threading
+import time
+import uuid
+from typing import Callable, Dict, List, MutableMapping, Optional
+
+import streamlit as st
+
+from data_models import dataset_fingerprint
+from dataset_store import get_store
+
+MB = 1024 * 1024
+SESSION_CAP_BYTES = int(float(os.environ.get("SESSION_MEMORY_CAP_MB", "8")) * MB)
+PROCESS_CAP_BYTES = int(float(os.environ.get("PROCESS_MEMORY_CAP_MB", "512")) * MB)
+SESSION_IDLE_TTL_S = float(os.environ.get("SESSION_IDLE_TTL_S", "1800"))
+SWEEP_INTERVAL_S = float(os.environ.get("SESSION_SWEEP_INTERVAL_S", "10"))
+# A varredura por excesso libera ate esta fracao do teto, para nao disparar a cada rerun.
+SWEEP_LOW_WATERMARK = 0.9
+# Libera no app a tabela com todas as sessoes do processo (uso de operadores).
+MEMORY_REPORT_ENABLED = os.environ.get("SESSION_MEMORY_REPORT", "") == "1"
+
+_REGISTRY: Dict[str, Dict[str, object]] = {}
+_REGISTRY_LOCK = threading.Lock()
+_PROCESS_TOTAL = {"bytes": 0}
+_SWEEP_LOCK = threading.Lock()
+_LAST_SWEEP = {"at": 0.0}
+
+
+def _deep_sizeof(value: object, seen: Optional[set] = None) -> int:
+    if seen is None:
+        seen = set()
+    if id(value) in seen:
+        return 0
+    seen.add(id(value))
+    if hasattr(value, "memory_usage"):
+        usage = value.memory_usage(deep=True)
+        return int(usage.sum()) if hasattr(usage, "sum") else int(usage)
+    if hasattr(value, "nbytes"):
+        return sys.getsizeof(value) + int(getattr(value, "nbytes", 0))
+    size = sys.getsizeof(value)
+    if isinstance(value, dict):
+        size += sum(_deep_sizeof(key, seen) + _deep_sizeof(item, seen) for key, item in value.items())
+    elif isinstance(value, (list, tuple, set, frozenset)):
+        size += sum(_deep_sizeof(item, seen) for item in value)
+    return size
+
+
+def _is_figure(value: object) -> bool:
+    return hasattr(value, "to_plotly_json")
+
+
+def estimate_bytes(value: object) -> int:
+    """
+    Estima a memoria ocupada pelo objeto, sem serializa-lo.
+    """
+    if _is_figure(value):
+        # As propriedades de uma go.Figure ficam em _data (traces) e _layout.
+        seen: set = set()
+        return _deep_sizeof(getattr(value, "_data", []), seen) + _deep_sizeof(getattr(value, "_layout", {}), seen)
+    return _deep_sizeof(value)
+
+
+def _session_id(state: MutableMapping) -> str:
+    # Um id proprio no session_state: o id do runtime se repete entre AppTests e reconexoes.
+    return state.setdefault("memory_session_id", uuid.uuid4().hex)
+
+
+def _new_record(derived: Dict[tuple, Dict[str, object]]) -> Dict[str, object]:
+    return {
+        "lock": threading.Lock(),
+        "last_seen": time.monotonic(),
+        "dataset_bytes": 0,
+        "derived_bytes": 0,
+        "figure_bytes": 0,
+        "derived": derived,
+    }
+
+
+def _record_for(session_id: str, state: MutableMapping) -> Dict[str, object]:
+    derived = state.setdefault("derived", {})
+    record = _REGISTRY.get(session_id)
+    if record is None or record["derived"] is not derived:
+        with _REGISTRY_LOCK:
+            previous = _REGISTRY.get(session_id)
+            record = _new_record(derived)
+            _REGISTRY[session_id] = record
+        if previous is not None:
+            _drop_record_bytes(previous)
+    return record
+
+
+def _record_total(record: Dict[str, object]) -> int:
+    return record["dataset_bytes"] + record["derived_bytes"] + record["figure_bytes"]
+
+
+def _add_bytes(record: Dict[str, object], field: str, delta: int) -> None:
+    record[field] += delta
+    with _REGISTRY_LOCK:
+        _PROCESS_TOTAL["bytes"] += delta
+
+
+def _drop_record_bytes(record: Dict[str, object]) -> None:
+    with _REGISTRY_LOCK:
+        _PROCESS_TOTAL["bytes"] -= _record_total(record)
+
+
+def _pop_entry(record: Dict[str, object], key: tuple) -> Optional[Dict[str, object]]:
+    entry = record["derived"].pop(key, None)
+    if entry is not None:
+        _add_bytes(record, "figure_bytes" if entry["is_figure"] else "derived_bytes", -entry["bytes"])
+    return entry
+
+
+def _put_entry(record: Dict[str, object], key: tuple, entry: Dict[str, object]) -> None:
+    record["derived"][key] = entry
+    _add_bytes(record, "figure_bytes" if entry["is_figure"] else "derived_bytes", entry["bytes"])
+
+
+def _clear_derived(record: Dict[str, object]) -> None:
+    with record["lock"]:
+        for key in list(record["derived"]):
+            _pop_entry(record, key)
+
+
+def _evict_lru(record: Dict[str, object], budget: int) -> None:
+    # Dicts preservam a ordem de insercao; o acesso move a entrada para o fim.
+    with record["lock"]:
+        derived = record["derived"]
+        while derived and record["derived_bytes"] + record["figure_bytes"] > budget:
+            _pop_entry(record, next(iter(derived)))
+
+
+def sweep(current_id: Optional[str] = None, force: bool = False) -> None:
+    """
+    Varredura do processo: expira sessoes inativas e, acima do teto, esvazia
+    os caches das sessoes mais ociosas. Roda no maximo a cada SWEEP_INTERVAL_S,
+    exceto quando o teto e ultrapassado, e nunca em duas threads ao mesmo tempo.
+    """
+    now = time.monotonic()
+    if not force and now - _LAST_SWEEP["at"] < SWEEP_INTERVAL_S:
+        return
+    if not _SWEEP_LOCK.acquire(blocking=False):
+        return
+    try:
+        _LAST_SWEEP["at"] = now
+        with _REGISTRY_LOCK:
+            records = list(_REGISTRY.items())
+
+        for session_id, record in records:
+            if session_id != current_id and now - record["last_seen"] > SESSION_IDLE_TTL_S:
+                _clear_derived(record)
+                with _REGISTRY_LOCK:
+                    if _REGISTRY.get(session_id) is record:
+                        del _REGISTRY[session_id]
+                        _PROCESS_TOTAL["bytes"] -= record["dataset_bytes"]
+
+        if _PROCESS_TOTAL["bytes"] <= PROCESS_CAP_BYTES:
+            return
+        target = int(PROCESS_CAP_BYTES * SWEEP_LOW_WATERMARK)
+        idle_first = sorted(
+            (record for session_id, record in records if session_id != current_id),
+            key=lambda record: record["last_seen"],
+        )
+        for record in idle_first:
+            if _PROCESS_TOTAL["bytes"] <= target:
+                break
+            _clear_derived(record)
+
+        current = _REGISTRY.get(current_id) if current_id else None
+        if current is not None and _PROCESS_TOTAL["bytes"] > target:
+            others = _PROCESS_TOTAL["bytes"] - _record_total(current)
+            _evict_lru(current, max(target - others - current["dataset_bytes"], 0))
+    finally:
+        _SWEEP_LOCK.release()
+
+
+def touch_session(state: Optional[MutableMapping] = None) -> None:
+    """
+    Registra a sessao atual no inicio de cada rerun e invalida o cache derivado
+    quando o dataset muda.
+    """
+    state = st.session_state if state is None else state
+    dataset = state["dataset"]
+    fingerprint = dataset_fingerprint(dataset)
+    session_id = _session_id(state)
+    record = _record_for(session_id, state)
+    record["last_seen"] = time.monotonic()
+    if state.get("derived_fingerprint") != fingerprint or not record["dataset_bytes"]:
+        _clear_derived(record)
+        state["derived_fingerprint"] = fingerprint
+        with record["lock"]:
+            _add_bytes(record, "dataset_bytes", estimate_bytes(dataset) - record["dataset_bytes"])
+    sweep(session_id)
+
+
+def cached_derived(key: tuple, builder: Callable[[], object], state: Optional[MutableMapping] = None) -> object:
+    """
+    Retorna o artefato derivado do dataset atual, calculando-o apenas uma vez por sessao.
+    """
+    state = st.session_state if state is None else state
+    session_id = _session_id(state)
+    record = _record_for(session_id, state)
+    with record["lock"]:
+        entry = _pop_entry(record, key)
+        if entry is not None:
+            _put_entry(record, key, entry)
+            return entry["value"]
+
+    # Outra sessao (ou um processo anterior) pode ja ter persistido o resultado desta versao.
+    digest = state.get("derived_fingerprint")
+    store = get_store() if digest else None
+    value = None
+    if store is not None:
+        try:
+            value = store.load_derived(digest, key)
+        except sqlite3.Error:
+            store = None
+    if value is None:
+        value = builder()
+        if store is not None:
+            try:
+                store.save_derived(digest, key, value)
+            except sqlite3.Error:
+                pass
+
+    entry = {"value": value, "bytes": estimate_bytes(value), "is_figure": _is_figure(value)}
+    with record["lock"]:
+        _pop_entry(record, key)
+        _put_entry(record, key, entry)
+    _evict_lru(record, max(SESSION_CAP_BYTES - record["dataset_bytes"], 0))
+    sweep(session_id, force=_PROCESS_TOTAL["bytes"] > PROCESS_CAP_BYTES)
+    return value
+
+
+def _record_report(session_id: str, record: Dict[str, object], now: float) -> Dict[str, object]:
+    return {
+        "session_id": session_id,
+        "idle_s": now - record["last_seen"],
+        "dataset_bytes": record["dataset_bytes"],
+        "derived_bytes": record["derived_bytes"],
+        "figure_bytes": record["figure_bytes"],
+        "total_bytes": _record_total(record),
+    }
+
+
+def memory_report() -> List[Dict[str, object]]:
+    """
+    Lista o consumo estimado de cada sessao do processo, em bytes.
+    """
+    now = time.monotonic()
+    with _REGISTRY_LOCK:
+        items = list(_REGISTRY.items())
+    report = [_record_report(session_id, record, now) for session_id, record in items]
+    return sorted(report, key=lambda row: row["total_bytes"], reverse=True)
+
+
+def process_totals() -> Dict[str, int]:
+    with _REGISTRY_LOCK:
+        return {"sessions": len(_REGISTRY), "total_bytes": _PROCESS_TOTAL["bytes"]}
+
+
+def current_session_report(state: Optional[MutableMapping] = None) -> Optional[Dict[str, object]]:
+    state = st.session_state if state is None else state
+    session_id = state.get("memory_session_id")
+    record = _REGISTRY.get(session_id) if session_id else None
+    return _record_report(session_id, record, time.monotonic()) if record is not None else None
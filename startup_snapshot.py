@@ -0,0 +1,166 @@
+"""
+Snapshot de inicializacao: pre-calcula as analises e os graficos do dataset
+padrao em tempo de build, para que um worker novo sirva o primeiro dashboard
+sem recalcular nada. Inclui tambem um relatorio de tempo de import.
+
+Uso:
+    python startup_snapshot.py build [--path startup_snapshot.pkl]
+    python startup_snapshot.py report
+"""
+
+import argparse
+import hashlib
+import os
+import pickle
+import re
+import subprocess
+import sys
+from importlib import metadata
+from pathlib import Path
+from typing import Dict, List, Optional
+
+SNAPSHOT_VERSION = 2
+SNAPSHOT_PATH = Path(
+    os.environ.get("STARTUP_SNAPSHOT", Path(__file__).with_name("startup_snapshot.pkl"))
+)
+
+DERIVED_SOURCES: List[str] = ["charts.py", "data_models.py"]
+
+REPORT_MODULES: List[str] = [
+    "streamlit",
+    "pandas",
+    "plotly.graph_objects",
+    "data_models",
+    "charts",
+    "ui_components",
+]
+
+
+def derived_code_version() -> str:
+    """
+    Identifica o codigo que gera analises e figuras: fontes dos modulos e versao do plotly.
+    Resultados gravados com outra versao sao considerados desatualizados.
+    """
+    digest = hashlib.sha256(f"{SNAPSHOT_VERSION}".encode("utf-8"))
+    base = Path(__file__).parent
+    for module in DERIVED_SOURCES:
+        digest.update((base / module).read_bytes())
+    try:
+        digest.update(metadata.version("plotly").encode("utf-8"))
+    except metadata.PackageNotFoundError:
+        pass
+    return digest.hexdigest()
+
+
+def build_snapshot(path: Optional[Path] = None) -> Dict[str, object]:
+    """
+    Calcula esforco, projecao e figuras do dataset padrao e grava o pickle.
+    """
+    from charts import (
+        calcular_esforco,
+        compute_projection,
+        create_bar_chart,
+        create_donut_chart,
+        create_effort_line_chart,
+        create_percentage_change_chart,
+        create_price_line_chart,
+        create_projection_chart,
+    )
+    from data_models import build_default_data, dataset_fingerprint
+
+    df = build_default_data()
+    years = df["ano"].tolist()
+    comparison = (years[0], years[-1])
+    snapshot = {
+        "version": SNAPSHOT_VERSION,
+        "code_version": derived_code_version(),
+        "fingerprint": dataset_fingerprint(df),
+        "comparison": comparison,
+        "efforts": calcular_esforco(df),
+        "projection": compute_projection(df),
+        # go.Figure ja validado: o st.plotly_chart nao reconstroi a figura como faria com um dict.
+        "figures": {
+            "percentage_change": create_percentage_change_chart(df, *comparison),
+            "effort_line": create_effort_line_chart(df),
+            "price_line": create_price_line_chart(df),
+            "bar": create_bar_chart(df),
+            "donut": create_donut_chart(df),
+            "projection": create_projection_chart(df),
+        },
+    }
+    with open(path or SNAPSHOT_PATH, "wb") as handle:
+        pickle.dump(snapshot, handle, protocol=pickle.HIGHEST_PROTOCOL)
+    return snapshot
+
+
+def load_snapshot(path: Optional[Path] = None) -> Optional[Dict[str, object]]:
+    """
+    Le o snapshot gravado. Retorna None se ele nao existir ou estiver desatualizado.
+    """
+    try:
+        with open(path or SNAPSHOT_PATH, "rb") as handle:
+            snapshot = pickle.load(handle)
+    except (OSError, pickle.UnpicklingError, EOFError, AttributeError, ImportError, TypeError, ValueError):
+        return None
+    if not isinstance(snapshot, dict) or snapshot.get("version") != SNAPSHOT_VERSION:
+        return None
+    if snapshot.get("code_version") != derived_code_version():
+        return None
+    return snapshot
+
+
+_IMPORTTIME_LINE = re.compile(r"import time:\s*(\d+)\s*\|\s*(\d+)\s*\|\s*(\S.*)$")
+
+
+def measure_import_time(module: str) -> Dict[str, float]:
+    """
+    Importa o modulo em um interpretador novo com -X importtime e retorna os tempos em ms.
+    """
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        capture_output=True,
+        text=True,
+        cwd=Path(__file__).parent,
+    )
+    if result.returncode != 0:
+        raise RuntimeError(f"Falha ao importar {module}: {result.stderr.strip().splitlines()[-1]}")
+
+    self_us = cumulative_us = 0
+    for line in result.stderr.splitlines():
+        match = _IMPORTTIME_LINE.match(line)
+        if match and match.group(3).strip() == module:
+            self_us, cumulative_us = int(match.group(1)), int(match.group(2))
+    return {"self_ms": self_us / 1000, "cumulative_ms": cumulative_us / 1000}
+
+
+def format_import_report(modules: List[str]) -> str:
+    lines = [f"{'modulo':<24} {'proprio ms':>11} {'acumulado ms':>13}"]
+    for module in modules:
+        try:
+            timing = measure_import_time(module)
+        except RuntimeError as exc:
+            lines.append(f"{module:<24} {str(exc)}")
+            continue
+        lines.append(f"{module:<24} {timing['self_ms']:>11.1f} {timing['cumulative_ms']:>13.1f}")
+    return "\n".join(lines)
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Snapshot de inicializacao e relatorio de imports.")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    build_parser = subparsers.add_parser("build", help="Gera o snapshot do dataset padrao.")
+    build_parser.add_argument("--path", type=Path, default=SNAPSHOT_PATH)
+    report_parser = subparsers.add_parser("report", help="Mostra o tempo de import dos modulos.")
+    report_parser.add_argument("modules", nargs="*", default=REPORT_MODULES)
+    args = parser.parse_args(argv)
+
+    if args.command == "build":
+        build_snapshot(args.path)
+        print(f"Snapshot gravado em {args.path}")
+    else:
+        print(format_import_report(args.modules))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,14 @@
+import os
+import sys
+import tempfile
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+
+# Os modulos leem estes caminhos no import: isolam os testes do banco e do snapshot locais.
+_TMP = Path(tempfile.mkdtemp(prefix="app-tests-"))
+os.environ.setdefault("DATASET_DB", str(_TMP / "datasets.sqlite3"))
+os.environ.setdefault("STARTUP_SNAPSHOT", str(_TMP / "startup_snapshot.pkl"))
+
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
@@ -0,0 +1,109 @@
+from pathlib import Path
+
+from streamlit.testing.v1 import AppTest
+
+from data_models import DEFAULT_VALUES, build_default_data, compact_dataset
+
+APP_PATH = str(Path(__file__).resolve().parent.parent / "app.py")
+
+
+def _run_app() -> AppTest:
+    at = AppTest.from_file(APP_PATH, default_timeout=60)
+    at.run()
+    return at
+
+
+def _assert_dashboard(at: AppTest) -> None:
+    assert not at.exception, [element.message for element in at.exception]
+    assert len(at.get("plotly_chart")) == 6
+
+
+def test_dashboard_renders_without_snapshot():
+    at = _run_app()
+    _assert_dashboard(at)
+
+    years = list(at.selectbox(key="comparison_base_year").options)
+    at.selectbox(key="comparison_base_year").set_value(years[1])
+    at.selectbox(key="comparison_target_year").set_value(years[3])
+    at.run()
+    _assert_dashboard(at)
+
+
+def _edited_dataset():
+    edited = build_default_data()
+    edited["salario_minimo"] = edited["salario_minimo"].astype(float)
+    edited.loc[edited.index[2], "salario_minimo"] = 1350.55
+    return compact_dataset(edited)
+
+
+def test_dashboard_renders_edited_dataset():
+    at = _run_app()
+
+    at.session_state["dataset"] = _edited_dataset()
+    at.run()
+    _assert_dashboard(at)
+
+    at.radio(key="view_selector").set_value("Editor").run()
+    assert not at.exception
+    at.radio(key="view_selector").set_value("Dashboard").run()
+    _assert_dashboard(at)
+
+
+def test_dashboard_renders_after_reset():
+    at = _run_app()
+    at.sidebar.button[0].click().run()
+    _assert_dashboard(at)
+    assert at.session_state["dataset"]["salario_minimo"].tolist() == DEFAULT_VALUES["salario_minimo"]
+
+
+def test_memory_report_lists_sessions_when_enabled(monkeypatch):
+    import session_memory
+
+    monkeypatch.setattr(session_memory, "MEMORY_REPORT_ENABLED", True)
+    at = _run_app()
+    at.checkbox(key="memory_report_all").check().run()
+    assert not at.exception
+    assert len(at.dataframe) == 1
+
+
+def test_new_session_starts_from_default_after_another_session_edits():
+    from dataset_store import get_store
+
+    get_store().save_version(_edited_dataset(), label="Edicao")
+
+    at = _run_app()
+    _assert_dashboard(at)
+    assert at.session_state["dataset"]["salario_minimo"].tolist() == DEFAULT_VALUES["salario_minimo"]
+
+
+def test_saved_version_can_be_restored_from_picker():
+    from dataset_store import get_store
+
+    edited = _edited_dataset()
+    digest = get_store().save_version(edited, label="Edicao")
+
+    at = _run_app()
+    at.selectbox(key="version_selector").set_value(digest).run()
+    at.sidebar.button[1].click().run()
+    _assert_dashboard(at)
+    assert at.session_state["dataset_version"] == digest
+    assert at.session_state["dataset"]["salario_minimo"].tolist() == edited["salario_minimo"].tolist()
+
+
+def test_app_falls_back_to_memory_when_store_is_unavailable(monkeypatch):
+    import sqlite3
+
+    import dataset_store
+
+    def unavailable(*args, **kwargs):
+        raise sqlite3.OperationalError("unable to open database file")
+
+    monkeypatch.setattr(dataset_store, "_STORE", None)
+    monkeypatch.setattr(dataset_store, "_STORE_FAILED_AT", {"at": None})
+    monkeypatch.setattr(dataset_store, "DatasetStore", unavailable)
+
+    at = _run_app()
+    _assert_dashboard(at)
+    at.sidebar.button[0].click().run()
+    _assert_dashboard(at)
+    assert at.session_state["dataset_version"] is None
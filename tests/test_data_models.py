@@ -0,0 +1,30 @@
+import pandas as pd
+
+from data_models import DEFAULT_VALUES, build_default_data, compact_dataset, dataset_fingerprint
+
+
+def test_compact_dataset_dtype_policy():
+    df = pd.DataFrame(DEFAULT_VALUES)
+    df["preco_pro"] = df["preco_pro"].astype(float)
+    df.loc[0, "preco_pro"] = 9499.1
+    compact = compact_dataset(df)
+
+    assert compact["preco_base"].dtype == "int32"
+    assert compact["salario_minimo"].dtype == "float32"
+    # 9499.1 nao tem representacao exata em float32: a coluna fica em float64.
+    assert compact["preco_pro"].dtype == "float64"
+    assert compact["preco_pro"].iloc[0] == 9499.1
+
+
+def test_default_labels_share_one_categorical_dtype():
+    first, second = build_default_data(), compact_dataset(pd.DataFrame(DEFAULT_VALUES).iloc[:3])
+    assert isinstance(first["ano"].dtype, pd.CategoricalDtype)
+    assert first["ano"].dtype is second["ano"].dtype
+
+    custom = pd.DataFrame(DEFAULT_VALUES).assign(ano=[f"Ano {index}" for index in range(5)])
+    assert list(compact_dataset(custom)["ano"].cat.categories) == custom["ano"].tolist()
+
+
+def test_fingerprint_ignores_dtype():
+    df = build_default_data()
+    assert dataset_fingerprint(df) == dataset_fingerprint(pd.DataFrame(DEFAULT_VALUES))
@@ -0,0 +1,115 @@
+import sqlite3
+import time
+
+import pytest
+
+from data_models import build_default_data, compact_dataset, dataset_fingerprint
+import dataset_store
+from dataset_store import ConnectionPool, DatasetStore
+
+
+def _edited():
+    df = build_default_data()
+    df["preco_pro"] = df["preco_pro"].astype(float)
+    df.loc[df.index[0], "preco_pro"] = 9999.5
+    return compact_dataset(df)
+
+
+@pytest.fixture
+def store(tmp_path):
+    return DatasetStore(tmp_path / "datasets.sqlite3", pool_size=2)
+
+
+def test_identical_content_is_stored_once(store):
+    first = store.save_version(build_default_data())
+    second = store.save_version(build_default_data().copy())
+    assert first == second
+    assert len(store.list_versions()) == 1
+
+
+def _latest(store):
+    return store.list_versions()[0]["digest"]
+
+
+def test_saving_or_loading_makes_version_most_recent(store):
+    default = store.save_version(build_default_data())
+    time.sleep(0.01)
+    edited = store.save_version(_edited())
+    assert _latest(store) == edited
+    time.sleep(0.01)
+    store.save_version(build_default_data())
+    assert _latest(store) == default
+    time.sleep(0.01)
+    store.load_version(edited)
+    assert _latest(store) == edited
+
+
+def test_old_versions_are_pruned_with_their_derived_results(store, monkeypatch):
+    monkeypatch.setattr(dataset_store, "MAX_VERSIONS", 2)
+    oldest = store.save_version(build_default_data())
+    store.save_derived(oldest, ("derived", "efforts"), [1.0])
+    for value in (9999.5, 8888.5):
+        time.sleep(0.01)
+        df = _edited()
+        df["preco_pro"] = df["preco_pro"].astype(float)
+        df.loc[df.index[0], "preco_pro"] = value
+        store.save_version(df)
+
+    assert oldest not in [version["digest"] for version in store.list_versions()]
+    assert store.load_version(oldest) is None
+    assert store.load_derived(oldest, ("derived", "efforts")) is None
+
+
+def test_version_list_is_cached_until_next_save(store):
+    store.save_version(build_default_data())
+    assert len(store.list_versions()) == 1
+
+    with store.pool.connection() as connection:
+        connection.execute("DELETE FROM versions")
+    assert len(store.list_versions()) == 1
+
+    store.save_version(_edited())
+    assert len(store.list_versions()) == 1
+
+
+def test_load_version_round_trip_and_column_subset(store):
+    digest = store.save_version(_edited())
+    loaded = store.load_version(digest)
+    assert dataset_fingerprint(loaded) == digest
+
+    subset = store.load_version(digest, columns=["ano", "preco_pro"])
+    assert list(subset.columns) == ["ano", "preco_pro"]
+    assert subset["preco_pro"].iloc[0] == 9999.5
+
+
+def test_derived_results_are_scoped_to_code_version(tmp_path):
+    path = tmp_path / "datasets.sqlite3"
+    store = DatasetStore(path)
+    digest = store.save_version(build_default_data())
+    store.save_derived(digest, ("derived", "projection"), {"label": "x"})
+    assert store.load_derived(digest, ("derived", "projection")) == {"label": "x"}
+
+    with sqlite3.connect(path) as connection:
+        connection.execute("UPDATE derived SET code_version = 'antiga'")
+    assert store.load_derived(digest, ("derived", "projection")) is None
+
+    DatasetStore(path)
+    with sqlite3.connect(path) as connection:
+        assert connection.execute("SELECT COUNT(*) FROM derived").fetchone()[0] == 0
+
+
+def test_failed_connect_releases_pool_slot(tmp_path, monkeypatch):
+    pool = ConnectionPool(tmp_path / "datasets.sqlite3", size=1)
+    original = pool._connect
+
+    def failing_connect():
+        raise sqlite3.OperationalError("falha simulada")
+
+    monkeypatch.setattr(pool, "_connect", failing_connect)
+    with pytest.raises(sqlite3.OperationalError):
+        with pool.connection():
+            pass
+
+    monkeypatch.setattr(pool, "_connect", original)
+    with pool.connection() as connection:
+        assert connection.execute("SELECT 1").fetchone() == (1,)
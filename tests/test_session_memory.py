@@ -0,0 +1,88 @@
+import pytest
+
+import session_memory
+from data_models import build_default_data
+from session_memory import cached_derived, memory_report, process_totals, touch_session
+
+
+@pytest.fixture(autouse=True)
+def isolated_registry(monkeypatch):
+    # Sem store: os testes medem so o cache em memoria.
+    monkeypatch.setattr(session_memory, "get_store", lambda: None)
+    monkeypatch.setattr(session_memory, "SWEEP_INTERVAL_S", 0.0)
+    monkeypatch.setattr(session_memory, "_REGISTRY", {})
+    monkeypatch.setattr(session_memory, "_PROCESS_TOTAL", {"bytes": 0})
+    monkeypatch.setattr(session_memory, "_LAST_SWEEP", {"at": 0.0})
+
+
+def _session():
+    state = {"dataset": build_default_data()}
+    touch_session(state)
+    return state
+
+
+def _record(state):
+    return session_memory._REGISTRY[state["memory_session_id"]]
+
+
+def _payload(size):
+    return lambda: bytes(size)
+
+
+def test_sessions_get_distinct_ids():
+    first, second = _session(), _session()
+    assert first["memory_session_id"] != second["memory_session_id"]
+    assert process_totals()["sessions"] == 2
+
+
+def test_session_cap_evicts_least_recently_used(monkeypatch):
+    state = _session()
+    dataset_bytes = _record(state)["dataset_bytes"]
+    monkeypatch.setattr(session_memory, "SESSION_CAP_BYTES", dataset_bytes + 2500)
+
+    cached_derived(("derived", "a"), _payload(1000), state)
+    cached_derived(("derived", "b"), _payload(1000), state)
+    # Acessar "a" a torna a mais recente; "b" passa a ser a proxima a sair.
+    cached_derived(("derived", "a"), _payload(1000), state)
+    cached_derived(("derived", "c"), _payload(1000), state)
+
+    assert list(state["derived"]) == [("derived", "a"), ("derived", "c")]
+    assert _record(state)["derived_bytes"] == sum(entry["bytes"] for entry in state["derived"].values())
+
+
+def test_process_cap_clears_idle_sessions_first(monkeypatch):
+    idle, busy = _session(), _session()
+    cached_derived(("derived", "idle"), _payload(50_000), idle)
+    _record(idle)["last_seen"] -= 60
+    cached_derived(("derived", "busy"), _payload(20_000), busy)
+
+    monkeypatch.setattr(session_memory, "PROCESS_CAP_BYTES", process_totals()["total_bytes"] + 10_000)
+    cached_derived(("derived", "busy", 2), _payload(20_000), busy)
+
+    assert idle["derived"] == {}
+    assert _record(idle)["derived_bytes"] == 0
+    assert set(busy["derived"]) == {("derived", "busy"), ("derived", "busy", 2)}
+
+
+def test_idle_sessions_expire_and_release_their_bytes(monkeypatch):
+    expired, active = _session(), _session()
+    cached_derived(("derived", "x"), _payload(10_000), expired)
+    expired_total = _record(expired)["dataset_bytes"] + _record(expired)["derived_bytes"]
+    before = process_totals()["total_bytes"]
+
+    monkeypatch.setattr(session_memory, "SESSION_IDLE_TTL_S", 30.0)
+    _record(expired)["last_seen"] -= 60
+    touch_session(active)
+
+    assert expired["memory_session_id"] not in session_memory._REGISTRY
+    assert process_totals() == {"sessions": 1, "total_bytes": before - expired_total}
+
+
+def test_process_total_matches_memory_report():
+    first, second = _session(), _session()
+    cached_derived(("derived", "a"), _payload(3000), first)
+    cached_derived(("derived", "b"), _payload(5000), second)
+    second["dataset"] = build_default_data().iloc[:3]
+    touch_session(second)
+
+    assert process_totals()["total_bytes"] == sum(row["total_bytes"] for row in memory_report())
@@ -0,0 +1,60 @@
+from pathlib import Path
+
+import pytest
+import streamlit as st
+from streamlit.testing.v1 import AppTest
+
+import startup_snapshot
+import ui_components
+from startup_snapshot import build_snapshot, load_snapshot
+
+APP_PATH = str(Path(__file__).resolve().parent.parent / "app.py")
+
+BUILDERS = [
+    "calcular_esforco",
+    "compute_projection",
+    "create_bar_chart",
+    "create_donut_chart",
+    "create_effort_line_chart",
+    "create_percentage_change_chart",
+    "create_price_line_chart",
+    "create_projection_chart",
+]
+
+
+@pytest.fixture
+def snapshot_path(tmp_path, monkeypatch):
+    path = tmp_path / "startup_snapshot.pkl"
+    build_snapshot(path)
+    monkeypatch.setattr(startup_snapshot, "SNAPSHOT_PATH", path)
+    # O app guarda o snapshot em st.cache_resource: cada teste parte do cache vazio.
+    st.cache_resource.clear()
+    yield path
+    st.cache_resource.clear()
+
+
+def test_dashboard_is_served_from_snapshot(snapshot_path, monkeypatch):
+    def fail(*args, **kwargs):
+        raise AssertionError("o dashboard padrao deveria vir do snapshot")
+
+    for name in BUILDERS:
+        monkeypatch.setattr(ui_components, name, fail)
+
+    at = AppTest.from_file(APP_PATH, default_timeout=60)
+    at.run()
+    assert not at.exception, [element.message for element in at.exception]
+    assert len(at.get("plotly_chart")) == 6
+
+
+def test_snapshot_from_other_code_version_is_ignored(snapshot_path, monkeypatch):
+    assert load_snapshot(snapshot_path) is not None
+
+    monkeypatch.setattr(startup_snapshot, "derived_code_version", lambda: "outra versao")
+    assert load_snapshot(snapshot_path) is None
+
+
+def test_missing_or_corrupt_snapshot_is_ignored(tmp_path):
+    path = tmp_path / "startup_snapshot.pkl"
+    assert load_snapshot(path) is None
+    path.write_bytes(b"nao e um pickle")
+    assert load_snapshot(path) is None
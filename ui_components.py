@@ -1,4 +1,5 @@
-from typing import Optional
+import sqlite3
+from typing import Callable, Dict, Optional
 
 import pandas as pd
 import streamlit as st
@@ -23,7 +24,11 @@ from data_models import (
     MODEL_COLUMNS,
     MODEL_LABELS,
     MODEL_TITLES,
+    compact_dataset,
+    dataset_fingerprint,
 )
+from dataset_store import get_store
+from session_memory import cached_derived
 
 
 def render_kpi_card(
@@ -75,8 +80,19 @@ def render_kpi_card(
         expander.markdown(f"- **Insight:** {insight}")
 
 
-def render_dashboard(df: pd.DataFrame) -> None:
-    efforts = calcular_esforco(df)
+def render_dashboard(df: pd.DataFrame, snapshot: Optional[Dict[str, object]] = None) -> None:
+    if snapshot is not None and snapshot["fingerprint"] != dataset_fingerprint(df):
+        snapshot = None
+
+    def derived(name: str, builder: Callable, *args):
+        return cached_derived(("derived", name, *args), lambda: builder(df, *args))
+
+    def figure(name: str, builder: Callable, *args):
+        if snapshot is not None and (name != "percentage_change" or tuple(snapshot["comparison"]) == args):
+            return snapshot["figures"][name]
+        return cached_derived(("figure", name, *args), lambda: builder(df, *args))
+
+    efforts = snapshot["efforts"] if snapshot is not None else derived("efforts", calcular_esforco)
     years_options = df["ano"].tolist()
     base_effort_2021 = efforts.iloc[0]["preco_base"]
     pro_max_effort_2021 = efforts.iloc[0]["preco_pro_max"]
@@ -141,7 +157,7 @@ def render_dashboard(df: pd.DataFrame) -> None:
         )
 
     st.plotly_chart(
-        create_percentage_change_chart(df, base_year, compare_year),
+        figure("percentage_change", create_percentage_change_chart, base_year, compare_year),
         width="stretch",
     )
 
@@ -151,23 +167,23 @@ def render_dashboard(df: pd.DataFrame) -> None:
     with charts_row_1[0]:
         st.subheader("Evolucao do Esforco de Compra (salarios minimos)")
         st.caption("Normaliza o preco, mostrando o custo real em numero de salarios minimos.")
-        st.plotly_chart(create_effort_line_chart(df), width="stretch")
+        st.plotly_chart(figure("effort_line", create_effort_line_chart), width="stretch")
 
     with charts_row_1[1]:
         st.subheader("Evolucao do Preco Nominal (R$) por Modelo")
         st.caption("Mostra a trajetoria do preco de lancamento de cada modelo no Brasil.")
-        st.plotly_chart(create_price_line_chart(df), width="stretch")
+        st.plotly_chart(figure("price_line", create_price_line_chart), width="stretch")
 
     charts_row_2 = st.columns(2)
     with charts_row_2[0]:
         st.subheader("Comparativo de Preco Nominal: 2021 vs 2025")
         st.caption("Compara o primeiro e o ultimo ano da serie para cada modelo.")
-        st.plotly_chart(create_bar_chart(df), width="stretch")
+        st.plotly_chart(figure("bar", create_bar_chart), width="stretch")
 
     with charts_row_2[1]:
         st.subheader("Distribuicao de Custo (Linha 17 / 2025)")
         st.caption("Representa a participacao de cada modelo no desembolso total em 2025.")
-        st.plotly_chart(create_donut_chart(df), width="stretch")
+        st.plotly_chart(figure("donut", create_donut_chart), width="stretch")
 
     st.divider()
 
@@ -175,7 +191,7 @@ def render_dashboard(df: pd.DataFrame) -> None:
     st.caption(
         "Aplica o crescimento medio anual composto observado na serie para estimar valores do proximo ano."
     )
-    projection = compute_projection(df)
+    projection = snapshot["projection"] if snapshot is not None else derived("projection", compute_projection)
     proj_cols = st.columns((1, 2))
     with proj_cols[0]:
         st.markdown("##### Crescimento medio anual")
@@ -201,7 +217,7 @@ def render_dashboard(df: pd.DataFrame) -> None:
             "A projecao assume uma taxa de crescimento constante (CAGR). Use apenas como sinalizacao tendencial."
         )
     with proj_cols[1]:
-        st.plotly_chart(create_projection_chart(df), width="stretch")
+        st.plotly_chart(figure("projection", create_projection_chart), width="stretch")
 
 
 def render_editor(df: pd.DataFrame) -> None:
@@ -229,5 +245,13 @@ def render_editor(df: pd.DataFrame) -> None:
             st.error("Preencha todos os campos com numeros validos.")
             return
 
-        st.session_state["dataset"] = restored[list(COLUMN_DISPLAY_NAMES.keys())]
+        dataset = compact_dataset(restored[list(COLUMN_DISPLAY_NAMES.keys())])
+        st.session_state["dataset"] = dataset
+        st.session_state["dataset_version"] = None
+        store = get_store()
+        if store is not None:
+            try:
+                st.session_state["dataset_version"] = store.save_version(dataset, label="Edicao")
+            except sqlite3.Error:
+                st.warning("Nao foi possivel salvar a versao; os dados ficam apenas nesta sessao.")
         st.success("Dados atualizados. Volte ao dashboard para visualizar os graficos.")